@@ -0,0 +1,77 @@
+# Write throughput of the bulk endpoints against one request per row.
+#
+#   python bench/bulk.py --rows 10000
+#
+# Runs in-process through TestClient against a fresh SQLite database (or
+# DATABASE_URL), with the startup load pointed at an empty local file. Each
+# operation is timed as single-row requests (POST/PUT/DELETE /pokemon/...) on
+# the first --single-rows numbers and as /pokemon/bulk requests of --batch
+# items on the rest.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import synthetic_entries
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=10_000)
+parser.add_argument("--single-rows", type=int, default=1_000, help="rows written one request at a time")
+parser.add_argument("--batch", type=int, default=1_000, help="items per bulk request")
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="pokemon-bulk-bench-")
+empty = os.path.join(workdir, "empty.json")
+with open(empty, "w") as f:
+    f.write("[]")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bulk.db')}")
+os.environ["POKEMON_DATA_URL"] = empty
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+from pokemon_load_data import entry_to_row
+
+# Numbers far above anything already stored
+rows = [entry_to_row(entry, 10_000_000 + i) for i, entry in enumerate(synthetic_entries(args.rows, duplicate_ratio=0))]
+single, bulk = rows[:args.single_rows], rows[args.single_rows:]
+
+
+def timed(label, count, requests):
+    started = time.perf_counter()
+    for response in requests:
+        if response.status_code >= 300:
+            sys.exit(f"{label}: {response.status_code} {response.text[:200]}")
+    seconds = time.perf_counter() - started
+    return {"operation": label, "rows": count, "seconds": round(seconds, 3), "rows_per_sec": round(count / seconds) if seconds else None}
+
+
+def chunks(items):
+    return [items[i:i + args.batch] for i in range(0, len(items), args.batch)]
+
+
+results = []
+with TestClient(app) as client:
+    while client.get("/health/ready").status_code != 200:
+        time.sleep(0.1)
+
+    if single:
+        results.append(timed("create_single", len(single), (client.post("/pokemon/", json=row) for row in single)))
+        results.append(timed("update_single", len(single), (
+            client.put(f"/pokemon/{row['number']}", json={"name": row["name"], "hp": row["hp"] + 1}) for row in single
+        )))
+        results.append(timed("delete_single", len(single), (client.delete(f"/pokemon/{row['number']}") for row in single)))
+
+    if bulk:
+        results.append(timed("create_bulk", len(bulk), (client.post("/pokemon/bulk", json=chunk) for chunk in chunks(bulk))))
+        results.append(timed("update_bulk", len(bulk), (
+            client.put("/pokemon/bulk", json=[{"number": row["number"], "name": row["name"], "hp": row["hp"] + 1} for row in chunk])
+            for chunk in chunks(bulk)
+        )))
+        results.append(timed("delete_bulk", len(bulk), (
+            client.request("DELETE", "/pokemon/bulk", json=[row["number"] for row in chunk]) for chunk in chunks(bulk)
+        )))
+
+print(json.dumps({"rows": args.rows, "batch": args.batch, "results": results}, indent=2))
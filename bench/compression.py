@@ -0,0 +1,58 @@
+# CPU cost vs bytes saved of compressing list responses.
+#
+#   python bench/compression.py --rows 100 1000 --requests 1000
+#
+# Encodes pages of synthetic Pokémon the way read_pokemon does and times
+# each available encoding. "naive_cpu_ms" is the compression CPU spent on
+# --requests responses when every response is compressed (as GZipMiddleware
+# does); "cached_cpu_ms" is the same with the compressed body kept in the
+# response cache, i.e. one compression per distinct payload.
+import argparse
+import json
+import os
+import sys
+import time
+
+from synthetic import synthetic_entries
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+parser.add_argument("--requests", type=int, default=1000, help="responses served per distinct payload")
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression import ENCODINGS, compress
+from main import RESPONSE_FIELDS
+from pokemon_load_data import entry_to_row
+from serialization import encode_rows
+from settings import Settings
+
+min_size = Settings.from_env().compression_min_size
+
+results = []
+for rows in args.rows:
+    page = [dict(entry_to_row(entry, i + 1), pokemon_id=i + 1) for i, entry in enumerate(synthetic_entries(rows, duplicate_ratio=0))]
+    body = encode_rows(RESPONSE_FIELDS, [[row[field] for field in RESPONSE_FIELDS] for row in page])
+    for encoding in ENCODINGS:
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.process_time()
+            data = compress(body, encoding)
+            best = min(best, time.process_time() - started)
+        results.append({
+            "rows": rows,
+            "encoding": encoding,
+            "bytes": len(body),
+            "compressed_bytes": len(data),
+            "ratio": round(len(data) / len(body), 3),
+            "compressed": len(body) >= min_size,
+            "compress_ms": round(best * 1000, 3),
+            "naive_cpu_ms": round(best * 1000 * args.requests, 1),
+            "cached_cpu_ms": round(best * 1000, 3),
+            "bytes_saved": (len(body) - len(data)) * args.requests,
+        })
+
+print(json.dumps({"requests": args.requests, "min_size": min_size, "results": results}, indent=2))
@@ -0,0 +1,104 @@
+# Peak server memory and time to first byte of the NDJSON export.
+#
+#   python bench/export.py --rows 10000 100000 1000000
+#
+# For each size, seeds a fresh SQLite database, starts `main.py serve` on it
+# (one worker, startup load pointed at an empty local file) and downloads
+# GET /pokemon/export. The server's peak RSS comes from VmHWM in
+# /proc/<pid>/status, so this needs Linux; with a streaming export it should
+# stay flat as the row count grows.
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+parser.add_argument("--seed-only", nargs=2, metavar=("DATABASE_URL", "ROWS"), help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if args.seed_only:
+    # Seeding runs in its own process so the loader's memory is not counted
+    os.environ["DATABASE_URL"] = args.seed_only[0]
+    sys.path.insert(0, root)
+    from synthetic import synthetic_entries
+    from pokemon_load_data import ingest, prepare_database
+    prepare_database()
+    ingest(synthetic_entries(int(args.seed_only[1]), duplicate_ratio=0))
+    sys.exit(0)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+
+
+workdir = tempfile.mkdtemp(prefix="pokemon-export-bench-")
+empty = os.path.join(workdir, "empty.json")
+with open(empty, "w") as f:
+    f.write("[]")
+
+results = []
+for rows in args.rows:
+    database_url = f"sqlite:///{os.path.join(workdir, f'export-{rows}.db')}"
+    subprocess.run([sys.executable, "-W", "ignore", __file__, "--seed-only", database_url, str(rows)], stdout=subprocess.DEVNULL, check=True)
+
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, POKEMON_DATA_URL=empty)
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "main.py", "serve", "--workers", "1", "--port", str(port), "--log-level", "warning"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1):
+                    break
+            except OSError:
+                if server.poll() is not None:
+                    sys.exit(f"Server exited with {server.returncode}")
+                time.sleep(0.2)
+        idle_rss = peak_rss_mb(server.pid)
+
+        started = time.perf_counter()
+        size = 0
+        lines = 0
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/pokemon/export") as response:
+            first = response.read1(65536)
+            first_byte = time.perf_counter() - started
+            size += len(first)
+            lines += first.count(b"\n")
+            while chunk := response.read1(65536):
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+        seconds = time.perf_counter() - started
+
+        results.append({
+            "rows": lines,
+            "bytes": size,
+            "seconds": round(seconds, 2),
+            "rows_per_sec": round(lines / seconds),
+            "first_byte_ms": round(first_byte * 1000, 1),
+            "server_rss_idle_mb": idle_rss,
+            "server_peak_rss_mb": peak_rss_mb(server.pid),
+        })
+    finally:
+        server.terminate()
+        server.wait()
+
+print(json.dumps({"results": results}, indent=2))
@@ -0,0 +1,209 @@
+# HTTP throughput and latency of the API, endpoint by endpoint.
+#
+#   python bench/http_load.py --rows 100000 --concurrency 32 --requests 5000 --output results.json
+#
+# Seeds a fresh SQLite database (or DATABASE_URL) with synthetic rows, starts
+# the app with `main.py serve --workers N` and the startup load pointed at an
+# empty local file (so nothing is fetched from the network), then drives each
+# scenario with --concurrency keep-alive connections from an asyncio client.
+# Prints one JSON document with requests/s and p50/p95/p99 latency per
+# scenario, to be compared between commits.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from synthetic import SYLLABLES, TYPES, synthetic_entries
+
+SCENARIOS = ("list", "list_filtered", "search", "get", "create", "update", "delete")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=10_000, help="synthetic rows to seed (1k-1M)")
+parser.add_argument("--concurrency", type=int, default=32)
+parser.add_argument("--requests", type=int, default=2_000, help="requests per scenario")
+parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+parser.add_argument("--workers", type=int, default=1, help="server worker processes (main.py serve --workers)")
+parser.add_argument("--output", help="also write the results to this file")
+args = parser.parse_args()
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+workdir = tempfile.mkdtemp(prefix="pokemon-http-bench-")
+empty = os.path.join(workdir, "empty.json")
+with open(empty, "w") as f:
+    f.write("[]")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'http.db')}")
+os.environ["POKEMON_DATA_URL"] = empty
+sys.path.insert(0, root)
+
+from sqlalchemy import func, select
+from pokemon_load_data import Pokemon, SessionLocal, ingest, prepare_database
+
+prepare_database()
+session = SessionLocal()
+if session.scalar(select(func.count()).select_from(Pokemon)) < args.rows:
+    ingest(synthetic_entries(args.rows, seed=args.seed))
+numbers = list(session.scalars(select(Pokemon.number)))
+session.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    command = [
+        sys.executable, "main.py", "serve", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, cwd=root, env=os.environ.copy())
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"Server exited with {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    sys.exit("Server did not become ready")
+
+
+async def send_request(reader, writer, method, path, body=None):
+    # Minimal HTTP/1.1 keep-alive client; returns the status code
+    head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+    writer.write(head.encode() + b"\r\n" + (body or b""))
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length and method != "HEAD" and status not in (204, 304):
+        await reader.readexactly(length)
+    return status
+
+
+def scenario_requests(name, rng):
+    # The requests of one scenario, generated up front so every run of a
+    # given seed sends the same ones
+    created = iter(range(10_000_000, 10_000_000 + args.requests))
+    sorts = ["pokemon_id", "-total", "name", "-hp,name", "speed"]
+    for _ in range(args.requests):
+        if name == "list":
+            yield "GET", f"/pokemon/?limit=100&sort={rng.choice(sorts)}", None
+        elif name == "list_filtered":
+            # Distinct filters so most requests miss the response cache
+            low = rng.randint(5, 150)
+            yield "GET", f"/pokemon/?limit=100&hp_gte={low}&hp_lt={low + 20}&generation={rng.randint(1, 9)}&number_gte={rng.choice(numbers)}", None
+        elif name == "search":
+            keyword = "".join(rng.choice(SYLLABLES) for _ in range(2))
+            yield "GET", f"/pokemon/?limit=20&keyword={keyword}", None
+        elif name == "get":
+            yield "GET", f"/pokemon/{rng.choice(numbers)}", None
+        elif name == "create":
+            body = {"number": next(created), "name": "Benchmon", "type_1": rng.choice(TYPES), "hp": rng.randint(5, 180)}
+            yield "POST", "/pokemon/", json.dumps(body).encode()
+        elif name == "update":
+            yield "PATCH", f"/pokemon/{rng.choice(numbers)}", json.dumps({"hp": rng.randint(5, 180)}).encode()
+        elif name == "delete":
+            # Removes what the create scenario added
+            yield "DELETE", f"/pokemon/{next(created)}", None
+
+
+async def run_scenario(name, port):
+    pending = list(scenario_requests(name, random.Random(f"{args.seed}-{name}")))
+    pending.reverse()
+    latencies = []
+    statuses = {}
+
+    async def worker():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while pending:
+                method, path, body = pending.pop()
+                started = time.perf_counter()
+                status = await send_request(reader, writer, method, path, body)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        # Filtered lists with no match answer 404, so statuses are reported as is
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+port = args.port or free_port()
+server = start_server(port)
+try:
+    results = [asyncio.run(run_scenario(name, port)) for name in args.scenarios]
+finally:
+    server.terminate()
+    server.wait()
+
+report = {
+    "revision": git_revision(),
+    "python": platform.python_version(),
+    "database": os.environ["DATABASE_URL"].split(":")[0],
+    "rows": args.rows,
+    "concurrency": args.concurrency,
+    "workers": args.workers,
+    "seed": args.seed,
+    "results": results,
+}
+output = json.dumps(report, indent=2)
+print(output)
+if args.output:
+    with open(args.output, "w") as f:
+        f.write(output + "\n")
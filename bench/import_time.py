@@ -0,0 +1,76 @@
+# Import cost of the app, to catch startup regressions.
+#
+#   python bench/import_time.py --budget-ms 200
+#
+# Imports `main` in fresh interpreters with `python -X importtime` and
+# DATABASE_URL pointed at an unreachable PostgreSQL server, so an import that
+# connects to the database hangs and fails. Prints the median total import
+# time, the self time of the project's own modules and the slowest
+# dependencies as JSON. Exits non-zero if the project's modules take more
+# than --budget-ms of self time or a module that should only be loaded on
+# demand (HTTP client, server, database driver) is imported.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Loaded by the loader, the CLI or the engine when needed, never by `import main`
+DEFERRED_MODULES = ("requests", "uvicorn", "psycopg2", "psycopg")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--module", default="main")
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--budget-ms", type=float, default=200, help="maximum self time of the project's modules")
+parser.add_argument("--top", type=int, default=10, help="slowest top-level dependencies to report")
+args = parser.parse_args()
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+first_party = {name[:-3] for name in os.listdir(root) if name.endswith(".py")}
+
+
+def import_times():
+    # {module: (self_us, cumulative_us, depth)} from one -X importtime run
+    env = dict(os.environ, DATABASE_URL="postgresql://pokemon@203.0.113.1:5432/pokemon_db")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {args.module}"],
+        cwd=root, env=env, capture_output=True, text=True, timeout=60,
+    )
+    if completed.returncode != 0:
+        sys.exit(completed.stderr)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2)
+    return times
+
+
+runs = [import_times() for _ in range(args.repeat)]
+median_ms = lambda values: round(statistics.median(values) / 1000, 1)
+
+own = {name: median_ms([run[name][0] for run in runs]) for name in runs[0] if name in first_party}
+dependencies = {
+    name: median_ms([run[name][1] for run in runs])
+    for name, (_, _, depth) in runs[0].items()
+    if depth == 1 and name.split(".")[0] not in first_party
+}
+deferred = sorted({name for run in runs for name in run if name.split(".")[0] in DEFERRED_MODULES})
+
+report = {
+    "module": args.module,
+    "total_ms": median_ms([run[args.module][1] for run in runs]),
+    "first_party_self_ms": round(sum(own.values()), 1),
+    "budget_ms": args.budget_ms,
+    "first_party": dict(sorted(own.items(), key=lambda item: -item[1])),
+    "dependencies": dict(sorted(dependencies.items(), key=lambda item: -item[1])[:args.top]),
+    "deferred_imported": deferred,
+}
+print(json.dumps(report, indent=2))
+
+if report["first_party_self_ms"] > args.budget_ms:
+    sys.exit(f"Project modules took {report['first_party_self_ms']} ms to import, over the {args.budget_ms} ms budget")
+if deferred:
+    sys.exit(f"Imported at startup: {', '.join(deferred)}")
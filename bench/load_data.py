@@ -0,0 +1,69 @@
+# Times the startup loader against a synthetic dataset.
+#
+#   python bench/load_data.py --rows 100000
+#
+# Runs the previous per-row loader (on a prefix of the file, since it issues
+# several queries and a commit per row) and the batched `ingest`, each against
+# a fresh SQLite database unless DATABASE_URL is set.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import write_json
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=100_000)
+parser.add_argument("--legacy-rows", type=int, default=1_000, help="rows fed to the per-row loader (0 to skip)")
+parser.add_argument("--batch-size", type=int, default=1000)
+args = parser.parse_args()
+
+workdir = tempfile.mkdtemp(prefix="pokemon-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'ingest.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from pokemon_load_data import Base, Pokemon, entry_to_row, ingest, prepare_database
+
+
+def legacy_load(session, data):
+    # The loader as it was before batching: lookups and a commit per entry
+    for entry in data:
+        number = entry.get("#")
+        while session.query(Pokemon).filter_by(number=number).first() is not None:
+            number += 1
+        if session.query(Pokemon).filter_by(number=number).first() is None:
+            session.add(Pokemon(**entry_to_row(entry, number)))
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+
+
+source = write_json(os.path.join(workdir, "pokemon.json"), args.rows)
+with open(source, encoding="utf-8") as f:
+    data = json.load(f)
+
+report = {"rows": args.rows}
+
+if args.legacy_rows:
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'legacy.db')}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    started = time.perf_counter()
+    legacy_load(session, data[:args.legacy_rows])
+    seconds = time.perf_counter() - started
+    session.close()
+    report["legacy"] = {"rows": args.legacy_rows, "seconds": round(seconds, 3), "rows_per_sec": round(args.legacy_rows / seconds)}
+
+prepare_database()
+stats = ingest(data, batch_size=args.batch_size)
+report["batched"] = {"rows": stats["rows"], "seconds": round(stats["seconds"], 3), "rows_per_sec": round(stats["rows_per_sec"])}
+
+stats = ingest(data, batch_size=args.batch_size)
+report["batched_reload"] = {"rows": stats["rows"], "seconds": round(stats["seconds"], 3), "rows_per_sec": round(stats["rows_per_sec"])}
+
+print(json.dumps(report, indent=2))
@@ -0,0 +1,113 @@
+# Several app processes starting together on one database.
+#
+#   python bench/multi_worker.py --workers 4 --rows 20000
+#
+# Writes a synthetic dataset and starts --workers `main.py serve --workers 1`
+# processes on one fresh SQLite database (or DATABASE_URL), all loading that
+# dataset at startup. The load lock is held by this script while they start:
+# each worker must answer /health/live and report not ready meanwhile. Once
+# it is released, every worker must become ready with the dataset written
+# once: one worker inserts the rows, the others skip the load as unchanged.
+# Prints the timings as JSON and exits non-zero if a check fails.
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from synthetic import write_json
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--workers", type=int, default=4)
+parser.add_argument("--rows", type=int, default=20_000)
+parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for each phase")
+args = parser.parse_args()
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+workdir = tempfile.mkdtemp(prefix="pokemon-multi-worker-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'multi.db')}")
+os.environ["POKEMON_DATA_URL"] = write_json(os.path.join(workdir, "pokemon.json"), args.rows)
+sys.path.insert(0, root)
+
+from sqlalchemy import func, select
+from pokemon_load_data import Pokemon, SessionLocal, loader_lock, prepare_database
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(port, path):
+    # (status, JSON body), or None while the server is not listening
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+    except OSError:
+        return None
+
+
+def wait_for(servers, path, status):
+    # Seconds until every server answered `path` with `status`
+    started = time.monotonic()
+    pending = set(servers)
+    while pending:
+        if time.monotonic() - started > args.timeout:
+            sys.exit(f"{len(pending)} worker(s) did not answer {status} on {path} within {args.timeout}s")
+        for port in list(pending):
+            if servers[port].poll() is not None:
+                sys.exit(f"Worker on port {port} exited with {servers[port].returncode}")
+            answer = get(port, path)
+            if answer is not None and answer[0] == status:
+                pending.discard(port)
+        time.sleep(0.1)
+    return round(time.monotonic() - started, 2)
+
+
+prepare_database()
+servers = {}
+report = {"workers": args.workers, "rows": args.rows, "database": os.environ["DATABASE_URL"].split(":")[0]}
+try:
+    with loader_lock():
+        for _ in range(args.workers):
+            port = free_port()
+            servers[port] = subprocess.Popen(
+                [sys.executable, "main.py", "serve", "--host", "127.0.0.1", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+                cwd=root, env=os.environ.copy(), stdout=subprocess.DEVNULL,
+            )
+        # Serving while another process holds the load lock, without being ready
+        report["live_seconds"] = wait_for(servers, "/health/live", 200)
+        not_ready = [port for port in servers if get(port, "/health/ready")[0] != 503]
+        if not_ready:
+            sys.exit(f"{len(not_ready)} worker(s) reported ready while the load lock was held")
+
+    report["ready_seconds"] = wait_for(servers, "/health/ready", 200)
+    loads = [get(port, "/health/ready")[1]["stats"] for port in servers]
+finally:
+    for server in servers.values():
+        server.terminate()
+    for server in servers.values():
+        server.wait()
+
+session = SessionLocal()
+stored = session.scalar(select(func.count()).select_from(Pokemon))
+distinct = session.scalar(select(func.count(Pokemon.number.distinct())))
+session.close()
+
+report["inserted"] = [load.get("inserted", 0) for load in loads]
+report["skipped"] = sum(1 for load in loads if load.get("skipped") == "unchanged")
+report["stored_rows"] = stored
+print(json.dumps(report, indent=2))
+
+if stored != args.rows or distinct != stored:
+    sys.exit(f"Expected {args.rows} rows stored once, found {stored} ({distinct} distinct numbers)")
+if sorted(report["inserted"]) != [0] * (args.workers - 1) + [args.rows] or report["skipped"] != args.workers - 1:
+    sys.exit("Expected exactly one worker to load the dataset and the others to skip it")
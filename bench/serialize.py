@@ -0,0 +1,73 @@
+# Per-row cost of turning a page of Pokémon into JSON bytes.
+#
+#   python bench/serialize.py --rows 1000
+#
+# "fastapi_default" is what returning ORM objects with
+# response_model=List[PokemonResponse] does (validate, jsonable_encoder,
+# json.dumps); "type_adapter" validates and dumps in one pydantic pass;
+# "column_tuples" is the fast path read_pokemon uses now. Timings include
+# fetching the rows from an in-memory SQLite database.
+import argparse
+import json
+import os
+import sys
+import time
+
+from synthetic import synthetic_entries
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=1000)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from pokemon_load_data import Pokemon, SessionLocal, entry_to_row, prepare_database
+from main import PokemonResponse, RESPONSE_FIELDS
+from serialization import encode_rows
+
+prepare_database()
+session = SessionLocal()
+session.execute(Pokemon.__table__.insert(), [entry_to_row(entry, i + 1) for i, entry in enumerate(synthetic_entries(args.rows))])
+session.commit()
+adapter = TypeAdapter(List[PokemonResponse])
+columns = [getattr(Pokemon, field) for field in RESPONSE_FIELDS]
+
+
+def fastapi_default():
+    objects = session.query(Pokemon).order_by(Pokemon.pokemon_id).all()
+    body = JSONResponse(jsonable_encoder(adapter.validate_python(objects, from_attributes=True))).body
+    session.expunge_all()
+    return body
+
+
+def type_adapter():
+    objects = session.query(Pokemon).order_by(Pokemon.pokemon_id).all()
+    body = adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+    session.expunge_all()
+    return body
+
+
+def column_tuples():
+    rows = session.execute(select(*columns).order_by(Pokemon.pokemon_id)).all()
+    return encode_rows(RESPONSE_FIELDS, rows)
+
+
+assert fastapi_default() == type_adapter() == column_tuples()
+
+results = {}
+for name, fn in [("fastapi_default", fastapi_default), ("type_adapter", type_adapter), ("column_tuples", column_tuples)]:
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    results[name] = {"total_ms": round(best * 1000, 2), "us_per_row": round(best * 1e6 / args.rows, 2)}
+
+print(json.dumps({"rows": args.rows, "results": results}, indent=2))
@@ -0,0 +1,80 @@
+# Peak memory and throughput of the dataset loader on a large generated file.
+#
+#   python bench/stream_parse.py --rows 1000000 --formats json ndjson csv
+#
+# Each run happens in its own process (fresh SQLite database, fresh RSS
+# high-water mark). "stream" is the loader as used at startup; "materialized"
+# parses the whole JSON document first, as the loader used to. Peak RSS comes
+# from getrusage, so this needs a POSIX system.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import WRITERS
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--formats", nargs="+", default=["json", "ndjson", "csv"], choices=sorted(WRITERS))
+parser.add_argument("--skip-materialized", action="store_true")
+parser.add_argument("--child", nargs=4, metavar=("MODE", "FORMAT", "PATH", "RESULT"), help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+if args.child:
+    mode, fmt, path, result_path = args.child
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import pokemon_load_data
+
+    pokemon_load_data.prepare_database()
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "stream":
+        stats = pokemon_load_data.load_source(path, force=True, fmt=fmt)
+    else:
+        with open(path, encoding="utf-8") as f:
+            stats = pokemon_load_data.ingest(json.load(f))
+    seconds = time.perf_counter() - started
+    with open(result_path, "w") as f:
+        json.dump({
+            "mode": mode,
+            "format": fmt,
+            "rows": stats["rows"],
+            "seconds": round(seconds, 2),
+            "rows_per_sec": round(stats["rows"] / seconds),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rss_before_load_mb": round(baseline, 1),
+        }, f)
+    sys.exit(0)
+
+workdir = tempfile.mkdtemp(prefix="pokemon-stream-bench-")
+runs = [("stream", fmt) for fmt in args.formats]
+if not args.skip_materialized and "json" in args.formats:
+    runs.append(("materialized", "json"))
+
+results = []
+for mode, fmt in runs:
+    path = os.path.join(workdir, f"pokemon.{fmt}")
+    if not os.path.exists(path):
+        WRITERS[fmt](path, args.rows)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, f'{mode}-{fmt}.db')}")
+    result_path = os.path.join(workdir, f"{mode}-{fmt}.result.json")
+    # The loader's per-row output is discarded so it does not pile up here
+    subprocess.run(
+        [sys.executable, "-W", "ignore", __file__, "--child", mode, fmt, path, result_path],
+        env=env, stdout=subprocess.DEVNULL, check=True,
+    )
+    with open(result_path) as f:
+        results.append(json.load(f))
+
+print(json.dumps({"rows": args.rows, "runs": results}, indent=2))
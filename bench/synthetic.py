@@ -0,0 +1,69 @@
+import csv
+import json
+import random
+
+TYPES = [
+    "Normal", "Fire", "Water", "Grass", "Electric", "Ice", "Fighting", "Poison", "Ground",
+    "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy",
+]
+SYLLABLES = ["pi", "ka", "chu", "bul", "ba", "saur", "char", "man", "der", "squir", "tle", "mew", "two", "eev", "ee", "gar", "dos"]
+
+
+def synthetic_entries(rows, duplicate_ratio=0.1, seed=0):
+    # Entries in the same shape as the upstream dataset, with a share of
+    # repeated numbers to exercise renumbering
+    rng = random.Random(seed)
+    number = 0
+    for _ in range(rows):
+        if number == 0 or rng.random() >= duplicate_ratio:
+            number += 1
+        stats = [rng.randint(5, 180) for _ in range(6)]
+        yield {
+            "#": number,
+            "Name": "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize(),
+            "Type 1": rng.choice(TYPES),
+            "Type 2": rng.choice(TYPES) if rng.random() < 0.5 else "",
+            "Total": sum(stats),
+            "HP": stats[0],
+            "Attack": stats[1],
+            "Defense": stats[2],
+            "Sp. Atk": stats[3],
+            "Sp. Def": stats[4],
+            "Speed": stats[5],
+            "Generation": rng.randint(1, 9),
+            "Legendary": rng.random() < 0.05,
+        }
+
+
+def write_json(path, rows, **kwargs):
+    # Written entry by entry so generating large files stays cheap
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, entry in enumerate(synthetic_entries(rows, **kwargs)):
+            if i:
+                f.write(", ")
+            json.dump(entry, f)
+        f.write("]")
+    return path
+
+
+def write_ndjson(path, rows, **kwargs):
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in synthetic_entries(rows, **kwargs):
+            f.write(json.dumps(entry))
+            f.write("\n")
+    return path
+
+
+def write_csv(path, rows, **kwargs):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        for entry in synthetic_entries(rows, **kwargs):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(entry))
+                writer.writeheader()
+            writer.writerow(entry)
+    return path
+
+
+WRITERS = {"json": write_json, "ndjson": write_ndjson, "csv": write_csv}
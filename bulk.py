@@ -0,0 +1,111 @@
+import json
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select
+
+from pokemon_load_data import BATCH_SIZE, Pokemon, batched, dialect_insert
+
+MAX_BULK_ITEMS = 10000
+DUPLICATE = (409, "Number repeated in this request")
+
+
+def validate_items(adapter, item_adapter, body):
+    # One validation pass over the whole array. Only if it fails are the
+    # items validated one by one, to tell the valid ones from the rest.
+    # Returns the items (None where invalid) and the results so far.
+    try:
+        items = adapter.validate_json(body)
+        errors = {}
+    except ValidationError as error:
+        errors = {}
+        for detail in error.errors():
+            if not detail["loc"] or not isinstance(detail["loc"][0], int):
+                raise HTTPException(status_code=422, detail=f"Expected a JSON array: {detail['msg']}")
+            field = ".".join(str(part) for part in detail["loc"][1:])
+            errors.setdefault(detail["loc"][0], []).append(f"{field}: {detail['msg']}" if field else detail["msg"])
+        raw = json.loads(body)
+        items = [None if i in errors else item_adapter.validate_python(item) for i, item in enumerate(raw)]
+
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ITEMS} items per request")
+    results = [(422, "; ".join(errors[i])) if i in errors else None for i in range(len(items))]
+    return items, results
+
+
+# Bulk writes: each function takes the validated items of one request and
+# fills in a (status, detail) pair per item, in request order. They only
+# execute statements; the caller decides whether to commit or roll back.
+
+def first_occurrences(numbers, results):
+    # Indexes of the items to apply; later repeats of a number are rejected
+    seen = set()
+    pending = []
+    for i, number in enumerate(numbers):
+        if results[i] is not None:
+            continue
+        if number in seen:
+            results[i] = DUPLICATE
+        else:
+            seen.add(number)
+            pending.append(i)
+    return pending
+
+
+def bulk_create(db, items, results):
+    # Multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING number: rows
+    # that come back were inserted, the rest already existed
+    table = Pokemon.__table__
+    insert = dialect_insert(db.get_bind().dialect.name)
+    pending = first_occurrences([item and item["number"] for item in items], results)
+    stmt = insert(table).on_conflict_do_nothing(index_elements=[table.c.number]).returning(table.c.number)
+    for batch in batched(pending, BATCH_SIZE):
+        # executemany: SQLAlchemy batches the rows into multi-row VALUES
+        inserted = set(db.connection().execute(stmt, [items[i] for i in batch]).scalars())
+        for i in batch:
+            if items[i]["number"] in inserted:
+                results[i] = (201, None)
+            else:
+                results[i] = (409, "Pokémon with this number already exists")
+    return results
+
+
+def bulk_update(db, items, results):
+    # Items hold the number plus the columns to change. Existing rows are
+    # locked (on PostgreSQL) and then updated with one executemany per
+    # distinct set of columns.
+    table = Pokemon.__table__
+    pending = first_occurrences([item and item["number"] for item in items], results)
+    existing = set()
+    for batch in batched(pending, BATCH_SIZE):
+        numbers = [items[i]["number"] for i in batch]
+        existing.update(db.scalars(select(table.c.number).where(table.c.number.in_(numbers)).with_for_update()))
+
+    groups = {}
+    for i in pending:
+        values = dict(items[i])
+        number = values.pop("number")
+        if number not in existing:
+            results[i] = (404, "Pokémon not found")
+            continue
+        groups.setdefault(tuple(sorted(values)), []).append(dict(values, b_number=number))
+        results[i] = (200, None)
+
+    stmt = table.update().where(table.c.number == bindparam("b_number"))
+    for params in groups.values():
+        for batch in batched(params, BATCH_SIZE):
+            db.connection().execute(stmt, batch)
+    return results
+
+
+def bulk_delete(db, numbers, results):
+    # DELETE ... WHERE number IN (...) RETURNING number
+    table = Pokemon.__table__
+    pending = first_occurrences(numbers, results)
+    deleted = set()
+    for batch in batched(pending, BATCH_SIZE):
+        stmt = table.delete().where(table.c.number.in_([numbers[i] for i in batch])).returning(table.c.number)
+        deleted.update(db.connection().execute(stmt).scalars())
+    for i in pending:
+        results[i] = (200, None) if numbers[i] in deleted else (404, "Pokémon not found")
+    return results
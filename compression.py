@@ -0,0 +1,60 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# In order of preference when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding):
+    # The encoding to use for a request's Accept-Encoding, None for identity
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            param_name, _, value = param.partition("=")
+            if param_name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+
+    best = None
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, encoding)
+    return best and best[1]
+
+
+def compress(body, encoding):
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def encode_body(body, encoding, min_size, variants=None, store=None):
+    # Returns the content to send and its Content-Encoding (None when sent
+    # as is). Bodies under `min_size` are sent as is: compression would
+    # save little and cost a round of CPU on every cache miss. `variants`
+    # holds bodies compressed earlier; a new one is handed to `store` so
+    # each cached body is compressed only once.
+    if encoding is None or len(body) < min_size:
+        return body, None
+    data = (variants or {}).get(encoding)
+    if data is None:
+        data = compress(body, encoding)
+        if store is not None:
+            store(encoding, data)
+    return data, encoding
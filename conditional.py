@@ -0,0 +1,53 @@
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+
+def http_date(timestamp):
+    return formatdate(timestamp, usegmt=True)
+
+
+def make_etag(version, modified_at, *parts):
+    # Changes with every write to the table; modified_at tells apart a
+    # database that was recreated and counts its versions from 0 again
+    digest = hashlib.blake2b(repr((modified_at,) + parts).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def validator_headers(etag, modified_at):
+    headers = {"ETag": etag}
+    # A Last-Modified issued within the second of the last write could be
+    # followed by another write in that same second, which If-Modified-Since
+    # could not tell apart; only send it once that second has passed
+    if int(modified_at) < int(time.time()):
+        headers["Last-Modified"] = http_date(modified_at)
+    return headers
+
+
+def etag_matches(header, etag, exists):
+    # If-None-Match uses weak comparison: W/ prefixes are ignored. "*"
+    # matches only if there is a current representation (RFC 9110,
+    # section 13.1.2), which the caller may not know yet.
+    if header.strip() == "*":
+        return exists
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return etag.removeprefix("W/") in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+def is_not_modified(request, etag, modified_at, exists=True):
+    # If-None-Match takes precedence; If-Modified-Since is only checked
+    # when it is absent (RFC 9110, section 13.2.2). Pass exists=False to
+    # check before the resource has been looked up.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, exists)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(modified_at) <= since
+    return False
@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+
+CHUNK_SIZE = 64 * 1024
+FORMATS = ("json", "ndjson", "csv")
+
+
+def detect_format(source, content_type=None):
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/jsonl") or source.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if content_type == "text/csv" or source.endswith(".csv"):
+        return "csv"
+    return "json"
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    # Yields the elements of a top-level JSON array one at a time, keeping
+    # only the current chunk (plus any element straddling it) in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array of entries")
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+
+        # The element runs past the buffer, or may: a number that reaches the
+        # end of the buffer, or stops at a fraction or exponent cut off there
+        # ("1." or "1e"), can go on in the next chunk. Read on and retry.
+        if end is None or (not eof and isinstance(item, (int, float)) and buffer[end:end + 1] in ("", ".", "e", "E")):
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def iter_ndjson(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def csv_value(value):
+    if value == "":
+        return None
+    if value.lstrip("-").isdigit():
+        return int(value)
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def iter_csv(f):
+    # Same headers as the JSON keys ("#", "Name", "Type 1", ...)
+    for row in csv.DictReader(f):
+        yield {key: csv_value(value) for key, value in row.items()}
+
+
+def read_entries(f, fmt="json"):
+    # `f` is a binary file; entries are decoded lazily from it
+    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+    if fmt == "json":
+        return iter_json_array(text)
+    if fmt == "ndjson":
+        return iter_ndjson(text)
+    if fmt == "csv":
+        return iter_csv(text)
+    raise ValueError(f"Unsupported dataset format: {fmt}")
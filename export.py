@@ -0,0 +1,32 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from pokemon_load_data import Pokemon, SessionLocal
+from serialization import encode_row
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched from the database (and sent as one chunk) at a time
+EXPORT_BATCH_SIZE = 1000
+
+
+def wants_ndjson(request):
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def iter_ndjson(query, fields):
+    # Runs in the response, after the request's session has been closed, so
+    # it uses a session of its own. yield_per streams the result: a
+    # server-side cursor on PostgreSQL, fetchmany batches on SQLite.
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            yield b"".join(encode_row(fields, row) + b"\n" for row in rows)
+    finally:
+        db.close()
+
+
+def ndjson_response(fields, order_by, filters=()):
+    # Every matching row, one JSON object per line, without pagination
+    query = select(*[getattr(Pokemon, field) for field in fields]).filter(*filters).order_by(*order_by)
+    return StreamingResponse(iter_ndjson(query, fields), media_type=NDJSON_MEDIA_TYPE)
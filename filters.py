@@ -0,0 +1,94 @@
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import not_, or_
+
+from pagination import INT64_MAX, INT64_MIN
+from pokemon_load_data import Pokemon, STAT_COLUMNS
+
+# Typed filters on GET /pokemon/, e.g. hp_gte=100&speed_lt=50&generation_in=1,2
+# &type=Fire&legendary=true. Each compiles to a plain comparison on the
+# column so it can be served by the column's index.
+NUMERIC_COLUMNS = ["number"] + STAT_COLUMNS
+RANGE_OPERATORS = {
+    "gte": lambda column, value: column >= value,
+    "gt": lambda column, value: column > value,
+    "lte": lambda column, value: column <= value,
+    "lt": lambda column, value: column < value,
+}
+TYPE_COLUMNS = ["type_1", "type_2"]
+FILTER_PATTERN = re.compile(rf"^({'|'.join(NUMERIC_COLUMNS)})(?:_(gte|gt|lte|lt|in))?$")
+SUFFIX_PATTERN = re.compile(r"^(\w+)_(gte|gt|lte|lt|in)$")
+
+
+def parse_int(name, value):
+    # Bounded so the value can be bound as a parameter
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or not INT64_MIN <= number <= INT64_MAX:
+        raise HTTPException(status_code=400, detail=f"Invalid integer for {name}: {value}")
+    return number
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_filters(query_params):
+    # Returns the WHERE clauses and a normalized form of the filters for
+    # cache keys. Parameters that are not filters are left alone.
+    clauses = []
+    normalized = []
+    for name, value in query_params.multi_items():
+        match = FILTER_PATTERN.match(name)
+        if match:
+            column = getattr(Pokemon, match.group(1))
+            operator = match.group(2)
+            if operator == "in":
+                values = [parse_int(name, item) for item in parse_list(value)]
+                clauses.append(column.in_(values))
+            elif operator:
+                clauses.append(RANGE_OPERATORS[operator](column, parse_int(name, value)))
+            else:
+                clauses.append(column == parse_int(name, value))
+        elif name == "type":
+            # Either type slot; `type=Fire,Water` matches any of them
+            types = parse_list(value)
+            clauses.append(or_(*[getattr(Pokemon, column).in_(types) for column in TYPE_COLUMNS]))
+        elif name in TYPE_COLUMNS:
+            clauses.append(getattr(Pokemon, name).in_(parse_list(value)))
+        elif name == "legendary":
+            if value.lower() not in ("true", "false", "1", "0"):
+                raise HTTPException(status_code=400, detail=f"Invalid boolean for legendary: {value}")
+            legendary = value.lower() in ("true", "1")
+            # Bare column rather than `= true`, matching the partial index
+            clauses.append(Pokemon.legendary if legendary else not_(Pokemon.legendary))
+        elif SUFFIX_PATTERN.match(name):
+            raise HTTPException(status_code=400, detail=f"Invalid filter: {name}")
+        else:
+            continue
+        normalized.append((name, value))
+    return clauses, tuple(sorted(normalized))
+
+
+def filter_parameters():
+    # OpenAPI entries for the filters, which are read from the raw query
+    # string rather than declared one by one on the endpoint
+    parameters = []
+    for column in NUMERIC_COLUMNS:
+        parameters.append({"name": column, "in": "query", "required": False, "schema": {"type": "integer"},
+                           "description": f"{column} equals"})
+        for operator in RANGE_OPERATORS:
+            parameters.append({"name": f"{column}_{operator}", "in": "query", "required": False,
+                               "schema": {"type": "integer"}, "description": f"{column} {operator}"})
+        parameters.append({"name": f"{column}_in", "in": "query", "required": False, "schema": {"type": "string"},
+                           "description": f"{column} is one of (comma-separated)"})
+    parameters.append({"name": "type", "in": "query", "required": False, "schema": {"type": "string"},
+                       "description": "type_1 or type_2 is one of (comma-separated)"})
+    for column in TYPE_COLUMNS:
+        parameters.append({"name": column, "in": "query", "required": False, "schema": {"type": "string"},
+                           "description": f"{column} is one of (comma-separated)"})
+    parameters.append({"name": "legendary", "in": "query", "required": False, "schema": {"type": "boolean"}})
+    return parameters
@@ -1,9 +1,32 @@
-from fastapi import HTTPException, Path, Body, Query
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Path, Body, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
-from pokemon_load_data import SessionLocal, Pokemon, app
-import uvicorn
-from sqlalchemy import asc, desc
+from pokemon_load_data import (
+    Pokemon, STAT_COLUMNS, bump_pokemon_version, dataset_loaded, dialect_insert, get_db, get_engine, load_state,
+    prepare_database, read_pokemon_version, start_loader, upsert_statement,
+)
+from db_pool import pool_stats
+from settings import Settings
+import metrics
+import importlib.util
+import os
+from sqlalchemy import exc, select
+from sqlalchemy.orm import Session
+from serialization import encode_row, encode_rows, encode_value
+from search import SEARCH_COLUMNS, fuzzy_search, keyword_filter
+from filters import filter_parameters, parse_filters
+from stats import GROUPINGS, aggregate_stats
+from bulk import bulk_create, bulk_delete, bulk_update, validate_items
+from response_cache import ResponseCache
+from conditional import is_not_modified, make_etag, validator_headers
+from compression import encode_body, negotiate
+from export import ndjson_response, wants_ndjson
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_cursor, decode_cursor, encode_cursor, order_clauses, parse_sort
+
+router = APIRouter()
 
 # Define Pydantic models
 class PokemonCreate(BaseModel):
@@ -24,6 +47,23 @@ class PokemonCreate(BaseModel):
 class PokemonResponse(PokemonCreate):
     pokemon_id: int
 
+# Response keys in the order PokemonResponse declares them
+RESPONSE_FIELDS = list(PokemonResponse.model_fields)
+RESPONSE_COLUMNS = [Pokemon.__table__.c[field] for field in RESPONSE_FIELDS]
+
+# Columns clients can sort on; each has an index on (column, pokemon_id)
+SORTABLE_COLUMNS = ["pokemon_id", "number", "name"] + STAT_COLUMNS
+
+def parse_fields(fields):
+    # Comma-separated subset of the response fields, kept in response order
+    if not fields:
+        return RESPONSE_FIELDS
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(RESPONSE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(sorted(unknown))}")
+    return [field for field in RESPONSE_FIELDS if field in requested]
+
 class PokemonUpdate(BaseModel):
     name: str
     type_1: Optional[str] = None
@@ -38,107 +78,477 @@ class PokemonUpdate(BaseModel):
     generation: Optional[int] = None
     legendary: Optional[bool] = None
 
+class PokemonPatch(PokemonUpdate):
+    # May be left out, but not set to null: the column is NOT NULL. The
+    # default is not validated, so only an explicit null gets a 422.
+    name: str = None
+
+class PokemonBulkUpdate(PokemonUpdate):
+    number: int
+
+
+@router.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def health_ready():
+    # Ready once the startup dataset load has finished; a failed load is
+    # retried, and its error reported here until then
+    if load_state["status"] != "ready":
+        content = {"detail": f"Dataset load {load_state['status']}"}
+        if load_state["error"]:
+            content["error"] = load_state["error"]
+        return JSONResponse(status_code=503, content=content)
+    return {"status": "ready", "stats": load_state["stats"]}
+
+def cached_response(request, db, key, compute):
+    # Response for `key` from the response cache, or from compute(), which
+    # returns the JSON body and an `extra` value stored with it. Returns the
+    # response and that value (None for a 304).
+    # The version is read before the data, so an ETag is never newer than
+    # the body it comes with
+    # Serialized GET /pokemon/ (and statistics) responses
+    pokemon_cache = request.app.state.pokemon_cache
+    version, modified_at = read_pokemon_version(db)
+    pokemon_cache.sync(version)
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    # Answer revalidations from the table version alone; every encoding is
+    # a representation of its own, with its own ETag
+    headers = validator_headers(make_etag(version, modified_at, *key, encoding), modified_at)
+    headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, headers["ETag"], modified_at, exists=False):
+        return Response(status_code=304, headers=headers), None
+
+    cached = pokemon_cache.get(key)
+    if cached is not None:
+        body, extra, variants = cached
+        headers["X-Cache"] = "HIT"
+    else:
+        generation = pokemon_cache.generation
+        body, extra = compute()
+        pokemon_cache.set(key, body, extra, generation)
+        variants = {}
+        headers["X-Cache"] = "MISS"
+    # compute() raises a 404 for an empty result; past it, "If-None-Match: *"
+    # matches too
+    if is_not_modified(request, headers["ETag"], modified_at):
+        return Response(status_code=304, headers=headers), None
+
+    # Compressed once per cached body, then served from the cache entry
+    store = lambda encoding, data: pokemon_cache.add_variant(key, body, encoding, data)
+    min_size = request.app.state.settings.compression_min_size
+    content, content_encoding = encode_body(body, encoding, min_size, variants, store)
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=content, media_type="application/json", headers=headers), extra
+
+def search_column_attribute(search_column):
+    # Keyword search is for text columns; numbers and flags use the typed filters
+    if search_column not in SEARCH_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Invalid search column: {search_column}")
+    return getattr(Pokemon, search_column)
+
+def query_pokemon(db, sort, search_column, keyword, match, limit, cursor, fields=RESPONSE_FIELDS, filters=()):
+    # Returns one page of Pokémon and the cursor of the next page, if any.
+    # Rows are plain column tuples starting with `fields`; columns needed
+    # only for ranking or the cursor are appended after them.
+    selected = list(fields) + [name for name, _ in sort if name not in fields]
+
+    query = select(*[getattr(Pokemon, field) for field in selected]).filter(*filters)
+
+    # Filter based on search
+    if keyword:
+        search_column_attr = search_column_attribute(search_column)
+
+        if match == "fuzzy":
+            # Ranked by relevance rather than the sort order, as a single page
+            if cursor:
+                raise HTTPException(status_code=400, detail="Fuzzy search results are not paginated")
+            ranked_ids = fuzzy_search(db, Pokemon.__table__, search_column_attr, keyword, limit, filters)
+            db_pokemon = db.execute(query.filter(Pokemon.pokemon_id.in_(ranked_ids))).all()
+            if not db_pokemon:
+                raise HTTPException(status_code=404, detail="No Pokémon found")
+            rank = {pokemon_id: i for i, pokemon_id in enumerate(ranked_ids)}
+            id_index = selected.index("pokemon_id")
+            return sorted(db_pokemon, key=lambda row: rank[row[id_index]]), None
+
+        dialect_name = db.get_bind().dialect.name
+        query = query.filter(keyword_filter(dialect_name, Pokemon.__table__, search_column_attr, keyword))
+
+    # Sorting, with pokemon_id as the tie-breaker so pages never overlap
+    sort_keys = [(name, getattr(Pokemon, name), descending) for name, descending in sort]
+    query = query.order_by(*order_clauses(sort_keys))
+
+    # Keyset pagination: continue after the last row of the previous page
+    if cursor:
+        values = decode_cursor(cursor, sort_keys)
+        nulls_high = db.get_bind().dialect.name == "postgresql"
+        query = query.filter(after_cursor(sort_keys, values, nulls_high))
+
+    # One extra row tells whether another page follows
+    db_pokemon = db.execute(query.limit(limit + 1)).all()
+
+    if not db_pokemon:
+        raise HTTPException(status_code=404, detail="No Pokémon found")
+
+    next_cursor = None
+    if len(db_pokemon) > limit:
+        db_pokemon = db_pokemon[:limit]
+        last = db_pokemon[-1]
+        next_cursor = encode_cursor(sort_keys, [last[selected.index(name)] for name, _, _ in sort_keys])
+
+    return db_pokemon, next_cursor
 
-@app.get("/pokemon/", response_model=List[PokemonResponse])
+@router.get("/pokemon/", response_model=List[PokemonResponse], openapi_extra={"parameters": filter_parameters()})
 def read_pokemon(
-    sort_by: str = Query(default="pokemon_id", description="Column to sort by", regex="^(pokemon_id)$"),
+    request: Request,
+    sort_by: str = Query(default="pokemon_id", description="Column to sort by", regex=f"^({'|'.join(SORTABLE_COLUMNS)})$"),
     order: str = Query(default="asc", description="Sort order: 'asc' or 'desc'", regex="^(asc|desc)$"),
-    search_column: str = Query(default="name", description="Column to search in"),
-    keyword: Optional[str] = Query(None, description="Keyword to search for")
+    sort: Optional[str] = Query(None, description="Comma-separated sort keys, '-' for descending, e.g. '-total,name'; overrides sort_by and order"),
+    search_column: str = Query(default="name", description="Text column to search in: name, type_1 or type_2"),
+    keyword: Optional[str] = Query(None, description="Keyword to search for"),
+    match: str = Query(default="substring", description="'substring', or 'fuzzy' for typo-tolerant results ranked by relevance", regex="^(substring|fuzzy)$"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of Pokémon per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the previous page's Link header"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. 'name,number' (default: all)"),
+    db: Session = Depends(get_db),
 ):
-    db = SessionLocal()
+    fields = parse_fields(fields)
+    sort = parse_sort(sort or f"{'-' if order == 'desc' else ''}{sort_by}", SORTABLE_COLUMNS)
+    filters, filter_key = parse_filters(request.query_params)
+    if wants_ndjson(request):
+        return export_rows(sort, search_column, keyword, match, fields, filters)
+    # search_column and match only matter when there is a keyword
+    key = (tuple(sort), search_column if keyword else None, keyword, match if keyword else None, limit, cursor, tuple(fields), filter_key)
 
-    query = db.query(Pokemon)
+    def compute():
+        db_pokemon, next_cursor = query_pokemon(db, sort, search_column, keyword, match, limit, cursor, fields, filters)
+        # Keys stop at `fields`, dropping the extra cursor columns
+        return encode_rows(fields, db_pokemon), next_cursor
 
-    # Filter based on search
+    response, next_cursor = cached_response(request, db, key, compute)
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def export_rows(sort, search_column, keyword, match, fields, filters):
+    # NDJSON stream of every matching row; limit and cursor do not apply
     if keyword:
-        search_column_attr = getattr(Pokemon, search_column, None)
-        if search_column_attr is None:
-            db.close()
-            raise HTTPException(status_code=400, detail=f"Invalid search column: {search_column}")
-        query = query.filter(search_column_attr.ilike(f"%{keyword}%"))
-
-    # Sorting
-    if order == "asc":
-        query = query.order_by(asc(sort_by))
+        if match == "fuzzy":
+            raise HTTPException(status_code=400, detail="Fuzzy search results are not streamed")
+        filters = filters + [keyword_filter(get_engine().dialect.name, Pokemon.__table__, search_column_attribute(search_column), keyword)]
+    sort_keys = [(name, getattr(Pokemon, name), descending) for name, descending in sort]
+    return ndjson_response(fields, order_clauses(sort_keys), filters)
+
+# Declared before /pokemon/{number} so "export" is not taken for a number
+@router.get("/pokemon/export", response_class=StreamingResponse, openapi_extra={"parameters": filter_parameters()})
+def export_pokemon(
+    request: Request,
+    sort: str = Query("pokemon_id", description="Comma-separated sort keys, '-' for descending"),
+    search_column: str = Query(default="name", description="Text column to search in: name, type_1 or type_2"),
+    keyword: Optional[str] = Query(None, description="Keyword to search for"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+):
+    # Same rows as GET /pokemon/ with `Accept: application/x-ndjson`
+    filters, _ = parse_filters(request.query_params)
+    return export_rows(parse_sort(sort, SORTABLE_COLUMNS), search_column, keyword, "substring", parse_fields(fields), filters)
+
+def stats_response(request, db, groups):
+    # Aggregates are cached like list pages, so they are recomputed only
+    # after a write (or once the cache TTL runs out)
+    filters, filter_key = parse_filters(request.query_params)
+
+    def compute():
+        stats = {group: aggregate_stats(db, group, filters) for group in groups}
+        return encode_value(stats if len(groups) > 1 else stats[groups[0]]), None
+
+    response, _ = cached_response(request, db, ("stats", groups, filter_key), compute)
+    return response
+
+# Declared before /pokemon/{number} so "stats" is not taken for a number
+@router.get("/pokemon/stats", openapi_extra={"parameters": filter_parameters()})
+def pokemon_stats(request: Request, db: Session = Depends(get_db)):
+    return stats_response(request, db, GROUPINGS)
+
+@router.get("/pokemon/stats/{group}", openapi_extra={"parameters": filter_parameters()})
+def pokemon_stats_by(request: Request, group: str = Path(description="'type' or 'generation'", regex=f"^({'|'.join(GROUPINGS)})$"), db: Session = Depends(get_db)):
+    return stats_response(request, db, (group,))
+
+def bulk_request(db, apply, adapters, body, atomic, as_row):
+    items, results = validate_items(*adapters, body)
+    rows = [None if item is None else as_row(item) for item in items]
+    apply(db, rows, results)
+    failed = [status for status, _ in results if status >= 300]
+    applied = len(results) - len(failed)
+    # Atomic requests apply every item or none of them; otherwise the
+    # items that succeeded are committed and the others reported
+    if failed and atomic:
+        db.rollback()
+        results = [(424, "Not applied: another item failed") if status < 300 else (status, detail) for status, detail in results]
+        status_code = 422 if 422 in failed else 409
+        applied = 0
     else:
-        query = query.order_by(desc(sort_by))
+        if applied:
+            bump_pokemon_version(db)
+        db.commit()
+        status_code = 207 if failed else 200
 
-    db_pokemon = query.all()
-    db.close()
+    report = []
+    for i, ((status, detail), row) in enumerate(zip(results, rows)):
+        number = row if isinstance(row, int) or row is None else row["number"]
+        entry = {"index": i, "number": number, "status": status}
+        if detail:
+            entry["detail"] = detail
+        report.append(entry)
+    return Response(content=encode_value({"applied": applied, "results": report}), status_code=status_code, media_type="application/json")
 
-    if not db_pokemon:
-        raise HTTPException(status_code=404, detail="No Pokémon found")
+def bulk_body(schema):
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": {"type": "array", "items": schema}}}}}
+
+BULK_ATOMIC_DESCRIPTION = "Apply all items or none (default); with false, valid items are applied and failures reported (207)"
+# Adapters for the whole array and, to report per-item errors, for one item
+BULK_CREATE = (TypeAdapter(List[PokemonCreate]), TypeAdapter(PokemonCreate))
+BULK_UPDATE = (TypeAdapter(List[PokemonBulkUpdate]), TypeAdapter(PokemonBulkUpdate))
+BULK_DELETE = (TypeAdapter(List[int]), TypeAdapter(int))
+
+# Declared before the /pokemon/{number} routes so "bulk" is not taken for a number
+@router.post("/pokemon/bulk", openapi_extra=bulk_body(PokemonCreate.model_json_schema()))
+async def bulk_create_pokemon(request: Request, atomic: bool = Query(True, description=BULK_ATOMIC_DESCRIPTION), db: Session = Depends(get_db)):
+    body = await request.body()
+    return await run_in_threadpool(bulk_request, db, bulk_create, BULK_CREATE, body, atomic, lambda pokemon: pokemon.model_dump())
 
-    return db_pokemon
+@router.put("/pokemon/bulk", openapi_extra=bulk_body(PokemonBulkUpdate.model_json_schema()))
+async def bulk_update_pokemon(request: Request, atomic: bool = Query(True, description=BULK_ATOMIC_DESCRIPTION), db: Session = Depends(get_db)):
+    # Like PUT /pokemon/{number}, only the fields given are changed
+    body = await request.body()
+    return await run_in_threadpool(bulk_request, db, bulk_update, BULK_UPDATE, body, atomic, lambda pokemon: pokemon.model_dump(exclude_unset=True))
 
-@app.delete("/pokemon/{number}", response_model=PokemonResponse)
-def delete_pokemon(number: int = Path(description="The number of the Pokémon to delete")):
-    db = SessionLocal()
-    db_pokemon = db.query(Pokemon).filter(Pokemon.number == number).first()
+@router.delete("/pokemon/bulk", openapi_extra=bulk_body({"type": "integer"}))
+async def bulk_delete_pokemon(request: Request, atomic: bool = Query(True, description=BULK_ATOMIC_DESCRIPTION), db: Session = Depends(get_db)):
+    body = await request.body()
+    return await run_in_threadpool(bulk_request, db, bulk_delete, BULK_DELETE, body, atomic, lambda number: number)
+
+@router.get("/pokemon/{number}", response_model=PokemonResponse)
+def read_single_pokemon(
+    request: Request,
+    number: int = Path(description="The number of the Pokémon to get"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    db: Session = Depends(get_db),
+):
+    fields = parse_fields(fields)
+    version, modified_at = read_pokemon_version(db)
+    validators = validator_headers(make_etag(version, modified_at, "item", number, tuple(fields)), modified_at)
+    if is_not_modified(request, validators["ETag"], modified_at, exists=False):
+        return Response(status_code=304, headers=validators)
+
+    columns = [getattr(Pokemon, field) for field in fields]
+    db_pokemon = db.execute(select(*columns).where(Pokemon.number == number)).first()
     if db_pokemon is None:
-        db.close()
         raise HTTPException(status_code=404, detail="Pokémon not found")
-    db.delete(db_pokemon)
-    db.commit()
-    db.close()
-    return db_pokemon
-
-@app.post("/pokemon/", response_model=PokemonResponse)
-def create_pokemon(pokemon: PokemonCreate = Body(...)):
-    db = SessionLocal()
-    db_pokemon = db.query(Pokemon).filter(Pokemon.number == pokemon.number, Pokemon.name == pokemon.name).first()
-
-    if db_pokemon:
-        db.close()
-        raise HTTPException(status_code=400, detail="Pokémon with this number and name already exists")
-
-    new_pokemon = Pokemon(
-        number=pokemon.number,
-        name=pokemon.name,
-        type_1=pokemon.type_1,
-        type_2=pokemon.type_2,
-        total=pokemon.total,
-        hp=pokemon.hp,
-        attack=pokemon.attack,
-        defense=pokemon.defense,
-        sp_atk=pokemon.sp_atk,
-        sp_def=pokemon.sp_def,
-        speed=pokemon.speed,
-        generation=pokemon.generation,
-        legendary=pokemon.legendary
-    )
-
-    db.add(new_pokemon)
-    db.commit()
-    db.refresh(new_pokemon)
-    db.close()
+    if is_not_modified(request, validators["ETag"], modified_at):
+        return Response(status_code=304, headers=validators)
 
-    return new_pokemon
+    body = encode_row(fields, db_pokemon)
+    return Response(content=body, media_type="application/json", headers=validators)
 
+@router.get("/health/pool")
+async def health_pool():
+    # Connection pool usage: checked out connections, overflow in use,
+    # checkout waits and timeouts since startup
+    return pool_stats(get_engine())
 
-@app.put("/pokemon/{number}", response_model=PokemonResponse)
-def update_pokemon(number: int, pokemon: PokemonUpdate = Body(...)):
-    db = SessionLocal()
-    db_pokemon = db.query(Pokemon).filter(Pokemon.number == number).first()
+async def pool_timeout(request: Request, error: exc.TimeoutError):
+    # No connection became free within DB_POOL_TIMEOUT
+    return JSONResponse(status_code=503, content={"detail": "Database connection pool exhausted"}, headers={"Retry-After": "1"})
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@router.get("/cache/stats")
+async def cache_stats(request: Request):
+    return request.app.state.pokemon_cache.stats()
+
+@router.delete("/pokemon/{number}", response_model=PokemonResponse)
+def delete_pokemon(number: int = Path(description="The number of the Pokémon to delete"), db: Session = Depends(get_db)):
+    # DELETE ... RETURNING hands back the deleted row in the same statement
+    table = Pokemon.__table__
+    db_pokemon = db.execute(table.delete().where(table.c.number == number).returning(*RESPONSE_COLUMNS)).first()
+    if db_pokemon is not None:
+        bump_pokemon_version(db)
+    db.commit()
     if db_pokemon is None:
-        db.close()
         raise HTTPException(status_code=404, detail="Pokémon not found")
+    return Response(content=encode_row(RESPONSE_FIELDS, db_pokemon), media_type="application/json")
 
-    for key, value in pokemon.dict(exclude_unset=True).items():
-        setattr(db_pokemon, key, value)
+def prefers_merge(request):
+    # `Prefer: resolution=merge-duplicates` (as in PostgREST) turns the
+    # create into an upsert that overwrites the Pokémon with that number
+    prefer = request.headers.get("prefer", "")
+    return "resolution=merge-duplicates" in [part.strip() for part in prefer.replace(";", ",").split(",")]
+
+@router.post("/pokemon/", response_model=PokemonResponse)
+def create_pokemon(request: Request, pokemon: PokemonCreate = Body(...), db: Session = Depends(get_db)):
+    merge = prefers_merge(request)
+    dialect_name = db.get_bind().dialect.name
+    if merge:
+        stmt = upsert_statement(dialect_name)
+    else:
+        stmt = dialect_insert(dialect_name)(Pokemon.__table__).on_conflict_do_nothing(index_elements=[Pokemon.number])
 
+    # A single INSERT ... ON CONFLICT ... RETURNING: no separate existence
+    # check, so concurrent creates cannot both pass it and then collide
+    db_pokemon = db.execute(stmt.values(**pokemon.model_dump()).returning(*RESPONSE_COLUMNS)).first()
+    if db_pokemon is not None:
+        bump_pokemon_version(db)
     db.commit()
-    db.refresh(db_pokemon)
-    db.close()
+    if db_pokemon is None:
+        raise HTTPException(status_code=400, detail="Pokémon with this number already exists")
 
-    return db_pokemon
+    headers = {"Preference-Applied": "resolution=merge-duplicates"} if merge else {}
+    return Response(content=encode_row(RESPONSE_FIELDS, db_pokemon), media_type="application/json", headers=headers)
 
 
+def update_returning(db, number, values):
+    # UPDATE ... RETURNING: no lookup before the write and no refresh after
+    table = Pokemon.__table__
+    if values:
+        stmt = table.update().where(table.c.number == number).values(**values).returning(*RESPONSE_COLUMNS)
+    else:
+        stmt = select(*RESPONSE_COLUMNS).where(table.c.number == number)
+    db_pokemon = db.execute(stmt).first()
+    if db_pokemon is not None and values:
+        bump_pokemon_version(db)
+    db.commit()
+    if db_pokemon is None:
+        raise HTTPException(status_code=404, detail="Pokémon not found")
+    return Response(content=encode_row(RESPONSE_FIELDS, db_pokemon), media_type="application/json")
+
+@router.put("/pokemon/{number}", response_model=PokemonResponse)
+def update_pokemon(number: int, pokemon: PokemonUpdate = Body(...), db: Session = Depends(get_db)):
+    return update_returning(db, number, pokemon.model_dump(exclude_unset=True))
+
+@router.patch("/pokemon/{number}", response_model=PokemonResponse)
+def patch_pokemon(number: int, pokemon: PokemonPatch = Body(...), db: Session = Depends(get_db)):
+    # Only the fields present in the body are sent to the database
+    return update_returning(db, number, pokemon.model_dump(exclude_unset=True))
+
+
+
+# Set by `serve` in the environment of workers started after the first ones
+REPLACEMENT_WORKER = "POKEMON_REPLACEMENT_WORKER"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Database work happens here rather than at import, so importing the
+    # app (a reloader, each worker process, a test) stays cheap
+    settings = app.state.settings
+    engine = await run_in_threadpool(prepare_database, settings)
+    metrics.instrument_engine(engine)
+    if not settings.load_on_startup:
+        load_state["status"] = "ready"
+    elif os.getenv(REPLACEMENT_WORKER) and await run_in_threadpool(dataset_loaded, settings.data_url):
+        # Replacing a recycled worker of a running server: the dataset is
+        # already in place, so stay ready instead of fetching it again
+        load_state["status"] = "ready"
+    else:
+        start_loader(settings)
+    yield
+    engine.dispose()
+
+def create_app(settings=None):
+    app = FastAPI(lifespan=lifespan)
+    settings = settings or Settings.from_env()
+    app.state.settings = settings
+    app.state.pokemon_cache = ResponseCache(settings.response_cache_max_bytes, settings.response_cache_ttl)
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_exception_handler(exc.TimeoutError, pool_timeout)
+    app.include_router(router)
+    return app
 
-def main():
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+app = create_app()
+
+def default_workers():
+    # One worker per CPU this process may run on (respecting affinity and
+    # cpusets where the OS reports them), unless WEB_CONCURRENCY says otherwise
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return int(os.getenv("WEB_CONCURRENCY", cpus))
+
+def installed(module):
+    return importlib.util.find_spec(module) is not None
+
+def supervise(config):
+    # uvicorn's supervisor restarts a worker once it exits, but uvicorn.run()
+    # only uses it for two or more workers: a single worker recycled by
+    # --max-requests would not come back
+    from uvicorn import Server
+    from uvicorn.supervisors import Multiprocess
+
+    class Supervisor(Multiprocess):
+        def init_processes(self):
+            super().init_processes()
+            # Workers are spawned with the environment of the moment
+            os.environ[REPLACEMENT_WORKER] = "1"
+
+    server = Server(config)
+    Supervisor(config, target=server.run, sockets=[config.bind_socket()]).run()
+
+def main(argv=None):
+    import argparse
+    import uvicorn
+    from uvicorn.main import STARTUP_FAILURE
+
+    parser = argparse.ArgumentParser(description="Run the Pokémon API")
+    modes = parser.add_subparsers(dest="mode")
+    serve = modes.add_parser("serve", help="production server: several worker processes, no reloader")
+    dev = modes.add_parser("dev", help="single process that reloads on code changes (the default)")
+    for mode in (serve, dev):
+        mode.add_argument("--host", default="127.0.0.1")
+        mode.add_argument("--port", type=int, default=8000)
+        mode.add_argument("--log-level", default="info")
+    serve.add_argument("--workers", type=int, default=default_workers(), help="worker processes (default: CPU count or WEB_CONCURRENCY)")
+    serve.add_argument("--backlog", type=int, default=2048, help="pending connections the listening socket queues")
+    serve.add_argument("--keep-alive", type=int, default=5, help="seconds an idle keep-alive connection stays open")
+    serve.add_argument("--limit-concurrency", type=int, default=None, help="per worker, answer 503 beyond this many concurrent connections")
+    serve.add_argument("--max-requests", type=int, default=None, help="recycle a worker after this many requests; a new one replaces it once it has drained")
+    serve.add_argument("--graceful-timeout", type=int, default=30, help="seconds a stopping worker waits for requests in flight")
+    serve.add_argument("--access-log", action="store_true", help="log every request (off by default: it costs throughput)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "serve":
+        config = uvicorn.Config(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            backlog=args.backlog,
+            timeout_keep_alive=args.keep_alive,
+            limit_concurrency=args.limit_concurrency,
+            limit_max_requests=args.max_requests,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            access_log=args.access_log,
+            log_level=args.log_level,
+            # C event loop and HTTP parser when they are installed
+            loop="uvloop" if installed("uvloop") else "asyncio",
+            http="httptools" if installed("httptools") else "h11",
+        )
+        if args.workers > 1 or args.max_requests:
+            supervise(config)
+        else:
+            server = uvicorn.Server(config)
+            server.run()
+            if not server.started:
+                raise SystemExit(STARTUP_FAILURE)
+    else:
+        host = getattr(args, "host", "127.0.0.1")
+        port = getattr(args, "port", 8000)
+        uvicorn.run("main:app", host=host, port=port, log_level=getattr(args, "log_level", "info"), reload=True)
 
 if __name__ == "__main__":
     main()
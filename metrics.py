@@ -0,0 +1,174 @@
+import bisect
+import contextvars
+import threading
+import time
+
+from sqlalchemy import event
+
+# Prometheus text exposition, kept in process without a client library.
+# Request metrics are labelled by route template (/pokemon/{number}) rather
+# than the raw path, so the number of series stays bounded.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+UNMATCHED_ROUTE = "unmatched"
+NO_ROUTE = "none"
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self, kind="counter"):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {kind}"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def render(self):
+        return super().render("gauge")
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        label_names = self.labels + ("le",)
+        with self.lock:
+            for labels, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(label_names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {total}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+requests_total = Counter("http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"))
+requests_in_progress = Gauge("http_requests_in_progress", "HTTP requests being served", ("method",))
+request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+queries_total = Counter("db_queries_total", "Database statements executed, by the route that ran them", ("route",))
+query_duration = Histogram("db_query_duration_seconds", "Database statement latency", ("route",), QUERY_BUCKETS)
+ALL_METRICS = [requests_total, requests_in_progress, request_duration, queries_total, query_duration]
+
+# Queries of the current request. The route is only known once the router
+# has matched, so queries are buffered on the request and attributed at the
+# end; sync handlers run in a worker thread with a copy of this context,
+# which still points at the same list.
+current_queries = contextvars.ContextVar("current_queries", default=None)
+
+
+def render():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode()
+
+
+def route_label(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no per-request task or body buffering
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        queries = []
+        token = current_queries.set(queries)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_progress.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_progress.dec(method)
+            current_queries.reset(token)
+            route = route_label(scope)
+            requests_total.inc(method, route, status)
+            request_duration.observe(elapsed, method, route)
+            for duration in queries:
+                queries_total.inc(route)
+                query_duration.observe(duration, route)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which a failed statement simply drops
+    context.metrics_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.metrics_started
+    queries = current_queries.get()
+    if queries is not None:
+        queries.append(elapsed)
+    else:
+        # Outside a request, e.g. the startup loader
+        queries_total.inc(NO_ROUTE)
+        query_duration.observe(elapsed, NO_ROUTE)
+
+
+def instrument_engine(engine):
+    # Every app built by create_app() shares the engine; listen only once
+    if event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,105 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import and_, false, or_, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Widest integer a bind parameter can carry (SQLite INTEGER, PostgreSQL bigint)
+INT64_MIN = -2**63
+INT64_MAX = 2**63 - 1
+
+
+# A sort key is (name, column, descending); the last key must be unique
+# (pokemon_id) so every row has a distinct position in the order.
+
+def parse_sort(spec, sortable, unique="pokemon_id"):
+    # "-total,name" -> [("total", True), ("name", False), ("pokemon_id", False)];
+    # the unique column is appended (in the last key's direction) so ties
+    # are broken consistently, and keys after it are dropped
+    keys = []
+    for part in spec.split(","):
+        part = part.strip()
+        name = part.lstrip("-+")
+        if not name:
+            continue
+        if name not in sortable:
+            raise HTTPException(status_code=400, detail=f"Invalid sort column: {name}")
+        if name in [key for key, _ in keys]:
+            continue
+        keys.append((name, part.startswith("-")))
+        if name == unique:
+            return keys
+    if not keys:
+        raise HTTPException(status_code=400, detail="Empty sort")
+    keys.append((unique, keys[-1][1]))
+    return keys
+
+
+def sort_signature(sort_keys):
+    return ",".join(f"{'-' if descending else ''}{name}" for name, _, descending in sort_keys)
+
+
+def order_clauses(sort_keys):
+    return [column.desc() if descending else column.asc() for _, column, descending in sort_keys]
+
+
+def encode_cursor(sort_keys, values):
+    payload = {"s": sort_signature(sort_keys), "v": list(values)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_keys):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        signature = payload["s"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # A cursor only makes sense for the ordering it was issued for
+    if signature != sort_signature(sort_keys) or not isinstance(values, list) or len(values) != len(sort_keys):
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort order")
+    # The values become bind parameters, so each must fit its column: NULL
+    # only where the column allows it, otherwise the column's type (bools,
+    # which are ints in Python, are not integers here)
+    for (_, column, _), value in zip(sort_keys, values):
+        if value is None and column.nullable:
+            continue
+        if type(value) is not column.type.python_type:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if type(value) is int and not INT64_MIN <= value <= INT64_MAX:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after_cursor(sort_keys, values, nulls_high):
+    # Predicate selecting the rows strictly after `values` in the order.
+    # `nulls_high` says whether the database sorts NULL above every value
+    # (PostgreSQL) or below (SQLite), matching the plain ORDER BY so the
+    # sort can still come from an index.
+    same_direction = len({descending for _, _, descending in sort_keys}) == 1
+    if same_direction and not any(column.nullable for _, column, _ in sort_keys):
+        # Row-value comparison, which PostgreSQL turns into a single index seek
+        columns = tuple_(*[column for _, column, _ in sort_keys])
+        bound = tuple_(*values)
+        return columns < bound if sort_keys[0][2] else columns > bound
+
+    clauses = []
+    for i, ((_, column, descending), value) in enumerate(zip(sort_keys, values)):
+        equal = [
+            prior.is_(None) if prior_value is None else prior == prior_value
+            for (_, prior, _), prior_value in zip(sort_keys[:i], values[:i])
+        ]
+        nulls_first = nulls_high == descending
+        if value is None:
+            after = column.isnot(None) if nulls_first else false()
+        else:
+            beyond = column < value if descending else column > value
+            after = beyond if nulls_first else or_(beyond, column.is_(None))
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    # LRU of serialized response bodies (plus a small `extra` value such as
+    # a pagination cursor, and compressed variants of the body), bounded by
+    # total size. Entries belong to one version of the underlying table:
+    # sync() drops them all once the version has changed, and bumps
+    # `generation` so a response computed before that is not stored after.
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = 0
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2], entry[3]
+
+    def set(self, key, body, extra=None, generation=None):
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, body, extra, {})
+            self.size += len(body)
+            self._evict()
+
+    def add_variant(self, key, body, encoding, data):
+        # Stores `data`, `body` encoded with `encoding`, next to the body,
+        # unless the entry has been replaced or dropped in the meantime
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] is not body or encoding in entry[3]:
+                return
+            entry[3][encoding] = data
+            self.size += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def sync(self, version):
+        # Called with the table version read at the start of every request
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+                self.size = 0
+                self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        _, body, _, variants = self.entries.pop(key)
+        self.size -= len(body) + sum(len(data) for data in variants.values())
@@ -0,0 +1,144 @@
+import re
+
+from sqlalchemy import Float, Integer, func, or_, select, text
+
+# Text columns covered by the search index
+SEARCH_COLUMNS = ("name", "type_1", "type_2")
+# Same default as pg_trgm.similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+# Candidates fetched per requested result before re-ranking on SQLite
+FUZZY_CANDIDATES = 20
+
+
+def fts_table(table):
+    return f"{table.name}_fts"
+
+
+def create_search_index(connection, table):
+    # PostgreSQL: trigram GIN indexes, used by ILIKE '%kw%' and the % operator.
+    # SQLite: an FTS5 trigram table kept in sync with `table` by triggers.
+    dialect_name = connection.dialect.name
+    if dialect_name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for column in SEARCH_COLUMNS:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table.name}_{column}_trgm "
+                f"ON {table.name} USING gin ({column} gin_trgm_ops)"
+            ))
+    elif dialect_name == "sqlite":
+        fts = fts_table(table)
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+        ).first()
+        if exists:
+            return
+
+        columns = ", ".join(SEARCH_COLUMNS)
+        old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+        new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table.name}', "
+            f"content_rowid='pokemon_id', tokenize='trigram')"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table.name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.pokemon_id, {new_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table.name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.pokemon_id, {old_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {table.name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.pokemon_id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.pokemon_id, {new_values}); END"
+        ))
+        # Index whatever the table already holds
+        connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def like_pattern(keyword):
+    escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def fts_phrase(keyword):
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def keyword_filter(dialect_name, table, column, keyword):
+    # Case-insensitive substring match served by the search index
+    if column.name in SEARCH_COLUMNS and dialect_name == "sqlite" and len(keyword) >= 3:
+        # Trigram FTS matches phrases of 3+ characters as substrings
+        match = select(text("rowid")).select_from(text(fts_table(table))).where(
+            text(f"{fts_table(table)} MATCH :match")
+        )
+        return table.c.pokemon_id.in_(match.params(match=f"{column.name} : {fts_phrase(keyword)}"))
+    return column.ilike(like_pattern(keyword), escape="\\")
+
+
+def trigrams(value):
+    # Trigrams the way pg_trgm builds them: per lower-cased word, padded
+    # with two spaces in front and one behind
+    result = set()
+    for word in re.findall(r"\w+", (value or "").lower()):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(a, b):
+    a, b = trigrams(a), trigrams(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def fuzzy_search(db, table, column, keyword, limit, filters=()):
+    # Typo-tolerant search; returns pokemon_ids ranked by trigram similarity.
+    # `filters` apply to the candidates, so the best matches among the
+    # filtered rows are returned rather than the filtered best matches.
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        query = (
+            select(table.c.pokemon_id)
+            .where(or_(column.op("%")(keyword), column.ilike(like_pattern(keyword), escape="\\")), *filters)
+            .order_by(func.similarity(column, keyword).desc(), table.c.pokemon_id)
+            .limit(limit)
+        )
+        return list(db.scalars(query))
+
+    if dialect_name == "sqlite" and column.name in SEARCH_COLUMNS:
+        # Any shared trigram makes a candidate; bm25 picks the most promising
+        # ones, which are then scored like pg_trgm would
+        grams = {word[i:i + 3] for word in re.findall(r"\w+", keyword.lower()) for i in range(len(word) - 2)}
+        if grams:
+            match = f"{column.name} : (" + " OR ".join(fts_phrase(gram) for gram in sorted(grams)) + ")"
+            fts = (
+                text(f"SELECT rowid, rank FROM {fts_table(table)} WHERE {fts_table(table)} MATCH :match")
+                .bindparams(match=match)
+                .columns(rowid=Integer, rank=Float)
+                .subquery()
+            )
+            candidates = db.execute(
+                select(table.c.pokemon_id, column)
+                .join_from(table, fts, fts.c.rowid == table.c.pokemon_id)
+                .where(*filters)
+                .order_by(fts.c.rank)
+                .limit(limit * FUZZY_CANDIDATES)
+            ).all()
+        else:
+            candidates = []
+    else:
+        candidates = db.execute(
+            select(table.c.pokemon_id, column).where(column.ilike(like_pattern(keyword), escape="\\"), *filters).limit(limit)
+        ).all()
+
+    # Like the PostgreSQL query: similar enough, or containing the keyword
+    scored = []
+    for pokemon_id, value in candidates:
+        score = similarity(value, keyword)
+        if score >= SIMILARITY_THRESHOLD or keyword.lower() in (value or "").lower():
+            scored.append((score, pokemon_id))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [pokemon_id for _, pokemon_id in scored[:limit]]
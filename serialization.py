@@ -0,0 +1,19 @@
+import json
+
+# Same output format as FastAPI's JSONResponse
+_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def encode_rows(keys, rows):
+    # Rows come straight from the database as tuples of JSON-native values
+    # (int, str, bool, None), so they can be encoded without a validation
+    # pass through the response model
+    return _encoder.encode([dict(zip(keys, row)) for row in rows]).encode("utf-8")
+
+
+def encode_row(keys, row):
+    return _encoder.encode(dict(zip(keys, row))).encode("utf-8")
+
+
+def encode_value(value):
+    return _encoder.encode(value).encode("utf-8")
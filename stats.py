@@ -0,0 +1,39 @@
+from sqlalchemy import func, select, union_all
+
+from pokemon_load_data import Pokemon, STAT_COLUMNS
+
+# Columns summarized per group; generation is a grouping, not a stat
+AGGREGATE_COLUMNS = [column for column in STAT_COLUMNS if column != "generation"]
+GROUPINGS = ("type", "generation")
+
+
+def grouped_source(group, filters):
+    # Rows to aggregate, with the grouping value in a `grp` column. A
+    # dual-type Pokémon counts once for each of its types.
+    stats = [getattr(Pokemon, column) for column in AGGREGATE_COLUMNS]
+    if group == "generation":
+        return select(Pokemon.generation.label("grp"), *stats).filter(*filters).subquery()
+    first = select(Pokemon.type_1.label("grp"), *stats).filter(*filters)
+    second = select(Pokemon.type_2.label("grp"), *stats).filter(
+        *filters, Pokemon.type_2.isnot(None), Pokemon.type_2 != Pokemon.type_1
+    )
+    return union_all(first, second).subquery()
+
+
+def aggregate_stats(db, group, filters=()):
+    # One GROUP BY query: count plus avg/min/max of every stat per group
+    source = grouped_source(group, filters)
+    columns = [func.count().label("count")]
+    for column in AGGREGATE_COLUMNS:
+        value = source.c[column]
+        columns += [func.avg(value), func.min(value), func.max(value)]
+    query = select(source.c.grp, *columns).group_by(source.c.grp).order_by(source.c.grp)
+
+    result = []
+    for row in db.execute(query):
+        entry = {group: row[0], "count": row[1]}
+        for i, column in enumerate(AGGREGATE_COLUMNS):
+            avg, low, high = row[2 + 3 * i:5 + 3 * i]
+            entry[column] = {"avg": None if avg is None else round(float(avg), 2), "min": low, "max": high}
+        result.append(entry)
+    return result